@@ -15,7 +15,7 @@ from duplicates_cleanup import (ALLOWED_ACTIONS, LEFT_DIR_KEEP_ACTION,
                                 DuplicatesCleanup)
 from file_database import DEFAULT_DATABASE, FileManagerDatabase
 from file_utils import generate_file_sha1
-from utils import print_table
+from utils import print_table, setup_logging
 
 DEFAULT_MIN_SIZE = 1000000  # 1 MB
 DEFAULT_MIN_COMMON_MB = 20  # 20 MB
@@ -147,7 +147,7 @@ class FileDuplicates(FileManagerDatabase):
         self.dir_fsrecords[dir_b] = []
 
         for row in self._exec_query(
-                SELECT_DIR_FILES, (dir_a, dir_b), commit=False):
+                SELECT_DIR_FILES, (dir_a, dir_b)):
             self.file_info[row[1]] = FileInfo(row[1], row[3], row[5])
             self.fsrecord_info[row[0]] = FSRecortInfo(
                 row[0], row[4], row[2], row[1])
@@ -279,8 +279,7 @@ class FileDuplicates(FileManagerDatabase):
     def search_duplicate_folders(self, min_common_size: int) -> None:
         start_time = clock_gettime_ns(CLOCK_MONOTONIC)
         for row in self._exec_query(DUPLICATES_FOLDERS,
-                                    (self._disk_id, self._min_size),
-                                    commit=False):
+                                    (self._disk_id, self._min_size)):
             logging.debug(f"File {row[0]} have {row[1]} duplicates in "
                           f"folders {row[2]}")
             dirs = sorted([int(dir) for dir in row[2].split(",")])
@@ -305,8 +304,7 @@ class FileDuplicates(FileManagerDatabase):
         reclaim_groups = 0
         files_to_delete = 0
         for row in self._exec_query(SELECT_COPIES_IN_DIR,
-                                    (self._disk_id, self._min_size),
-                                    commit=False):
+                                    (self._disk_id, self._min_size)):
             self.file_info[row[0]] = FileInfo(row[0], row[2], row[5])
             reclaim_size += row[6]
             reclaim_groups += 1
@@ -318,9 +316,9 @@ class FileDuplicates(FileManagerDatabase):
             files_counter = 0
             fsrecords_list = row[3].split(",")
             duplicates_names = {}
-            for fs_record_id in fsrecords_list:
-                fs_record_id = int(fs_record_id)
-                file_path = self.get_path(fs_record_id)
+            file_paths = self.get_paths(
+                [int(fs_record_id) for fs_record_id in fsrecords_list])
+            for fs_record_id, file_path in file_paths.items():
                 file_name = file_path.replace(f"{self.get_path(row[1])}/", "")
                 self.fsrecord_info[fs_record_id] = FSRecortInfo(
                     fs_record_id, file_name, row[1], row[0])
@@ -465,8 +463,8 @@ class FileDuplicates(FileManagerDatabase):
     def delete_files(self, fsrecord_id_list: List[int]) -> int:
         """Returns size of reclamed space."""
         deleted_size = 0
-        for id in fsrecord_id_list:
-            file_path = self.mountpoint / self.get_path(id)
+        for id, path in self.get_paths(fsrecord_id_list).items():
+            file_path = self.mountpoint / path
             if file_path.exists() and self.check_hash(id):
                 print(f"Deleting {file_path}",
                       "dry-run" if self.dry_run else "")
@@ -500,7 +498,7 @@ class FileDuplicates(FileManagerDatabase):
 
     def delete_fsrecord(self, id: int) -> bool:
         try:
-            self._exec_query(DELETE_FSRECORD, (id,), commit=True)
+            self._exec_query(DELETE_FSRECORD, (id,))
         except OperationalError:
             return False
         return True
@@ -552,9 +550,7 @@ def main(argv):
                             help="Print verbose output",
                             action="count", default=0)
     args = arg_parser.parse_args(argv[1:])
-    logging.basicConfig(
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        level=logging.WARNING - 10 * (args.verbose if args.verbose < 3 else 2))
+    setup_logging(args.verbose)
 
     cleanup_config = DuplicatesCleanup(args.cleanup_config)
     with FileDuplicates(
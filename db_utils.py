@@ -1,10 +1,15 @@
 import logging
+import os
 import sqlite3
+from contextlib import contextmanager
 from pathlib import Path
 from time import sleep
-from typing import Dict, List, Sequence
+from typing import Dict, Iterator, List, Sequence, Union
 
 TABLE_SELECT = "SELECT `ROWID`, `{}`.* FROM `{}` ORDER BY `ROWID`"
+TABLE_COLUMNS = "SELECT `name` FROM pragma_table_info(?) ORDER BY `cid`"
+TABLE_DIFF = ("SELECT {columns} FROM `{left}`.`{table}` "
+              "EXCEPT SELECT {columns} FROM `{right}`.`{table}`")
 # Tables and indexes to ignore
 TABLE_COMPARE: Dict[str, List[int]] = {
     "types": [],
@@ -17,10 +22,18 @@ _RETRY_COUNT = 3
 _RETRY_FIRST_DELAY = 1
 _RETRY_DELAY_EXP = 1.5
 
+# Set to non-empty value to trade durability for speed on throwaway DBs
+UNSAFE_PRAGMAS_ENV = "FILE_MANAGER_UNSAFE_PRAGMAS"
+_UNSAFE_PRAGMAS = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA temp_store = MEMORY",
+)
+
 
 def create_db(db_path: Path, db_dump: Path) -> None:
     connection = sqlite3.connect(db_path)
-    connection.executescript(db_dump.read_text())
+    connection.executescript(db_dump.read_bytes().decode("utf-8"))
     connection.close()
 
 
@@ -33,50 +46,73 @@ def dump_db(db_path: Path, db_dump: Path):
 
 
 def compare_db_with_ignores(db1_path: Path, dg2_path: Path) -> None:
-    connection_1 = sqlite3.connect(db1_path)
-    connection_2 = sqlite3.connect(dg2_path)
+    connection = sqlite3.connect(db1_path)
+    connection.execute("ATTACH DATABASE ? AS `other`", (str(dg2_path),))
     for table, excludes in TABLE_COMPARE.items():
-        res_1 = connection_1.execute(TABLE_SELECT.format(table, table))
-        res_2 = connection_2.execute(TABLE_SELECT.format(table, table))
-        while True:
-            rows_1 = res_1.fetchone()
-            rows_2 = res_2.fetchone()
-            if rows_1 is None and rows_2 is None:
-                break
-            if rows_1 is None or rows_2 is None:
-                assert 0
-            for i in range(len(rows_1)):
-                if i not in excludes:
-                    assert rows_1[i] == rows_2[i]
-    connection_1.close()
-    connection_2.close()
+        columns = ["ROWID"] + [
+            row[0] for row in connection.execute(TABLE_COLUMNS, (table,))]
+        compare_columns = ", ".join(
+            f"`{column}`" for i, column in enumerate(columns)
+            if i not in excludes)
+        for left, right in (("main", "other"), ("other", "main")):
+            diff = connection.execute(TABLE_DIFF.format(
+                columns=compare_columns, table=table, left=left, right=right))
+            assert diff.fetchone() is None
+    connection.close()
 
 
 class SQLite3connection:
     """Basic sqlite3 coonection functionality."""
 
-    def __init__(self, db_path: Path):
-        self._con = sqlite3.connect(db_path, timeout=10)
+    def __init__(self, db_path: Union[Path, str], uri: bool = False):
+        """Connects to db_path, which is SQLite URI string if uri is set."""
+        # Autocommit mode, each write is committed on its own unless it is
+        # run within transaction()
+        self._con = sqlite3.connect(
+            db_path, timeout=10, isolation_level=None, uri=uri)
         logging.info(f"Using DB {db_path}")
+        if os.environ.get(UNSAFE_PRAGMAS_ENV):
+            logging.warning(f"Using unsafe PRAGMAs for DB {db_path}")
+            for pragma in _UNSAFE_PRAGMAS:
+                self._con.execute(pragma)
 
     def __enter__(self):
         """Allows use with and to ensure connection closure on exit."""
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        """Closing connect to DB."""
-        del exc_type, exc_value, traceback
+        """Committing pending changes, unless exiting on exception, and
+            closing connect to DB."""
+        del exc_value, traceback
         if self._con:
-            self._con.close()
+            try:
+                if self._con.in_transaction:
+                    self._exec_query(
+                        "ROLLBACK" if exc_type else "COMMIT", ())
+            finally:
+                self._con.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Runs queries of the block as single transaction, committed on
+            exit or rolled back on exception. Joins enclosing transaction."""
+        if self._con.in_transaction:
+            yield
+            return
+        self._exec_query("BEGIN", ())
+        try:
+            yield
+        except BaseException:
+            self._con.execute("ROLLBACK")
+            raise
+        self._exec_query("COMMIT", ())
 
-    def _exec_query(self, sql: str, params: Sequence, commit=True):
+    def _exec_query(self, sql: str, params: Sequence):
         """SQL quesy executor with logging."""
         delay: float = _RETRY_FIRST_DELAY
         for retry in range(_RETRY_COUNT):
             try:
                 result = self._con.execute(sql, params)
-                if commit:
-                    self._con.commit()
                 logging.debug("SQL succeed: %s with %r", sql, params)
                 return result
             except sqlite3.OperationalError as e:
@@ -44,7 +44,8 @@ CREATE UNIQUE INDEX IF NOT EXISTS "disk_uuid" ON "disks" (
 CREATE INDEX IF NOT EXISTS "disk_size" ON "disks" (
 	"DiskSize"	ASC
 );
-CREATE INDEX IF NOT EXISTS "parent_id" ON "fsrecords" (
-	"ParentId"	ASC
+CREATE INDEX IF NOT EXISTS "parent_id_name" ON "fsrecords" (
+	"ParentId"	ASC,
+	"Name"	ASC
 );
 COMMIT;
@@ -77,7 +77,8 @@ CREATE UNIQUE INDEX "disk_uuid" ON "disks" (
 CREATE INDEX "disk_size" ON "disks" (
 	"DiskSize"	ASC
 );
-CREATE INDEX "parent_id" ON "fsrecords" (
-	"ParentId"	ASC
+CREATE INDEX "parent_id_name" ON "fsrecords" (
+	"ParentId"	ASC,
+	"Name"	ASC
 );
 COMMIT;
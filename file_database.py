@@ -1,9 +1,10 @@
 """File database module."""
 
+import json
 import logging
 from pathlib import Path
 from time import time
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import file_utils
 from db_utils import SQLite3connection
@@ -12,6 +13,10 @@ from utils import timestamp2exif_str
 DEFAULT_DATABASE = Path("/var/lib/file-manager/fileManager.db")
 
 
+# Lists are bound as single JSON parameter to keep SQL text constant,
+# so statements are prepared once and reused from sqlite3 cache
+_JSON_LIST = "(SELECT `value` FROM json_each(?))"
+
 _DISK_SELECT = ("SELECT `ROWID`, `UUID`, `DiskSize`, `Label`"
                 " FROM `disks` WHERE `UUID` = ? OR `Label` = ?")
 _DISK_INSERT = ("INSERT INTO `disks` (`UUID`, `DiskSize`, `Label`) "
@@ -24,6 +29,8 @@ _FSRECORD_SELECT = ("SELECT `ROWID`, `SHA1ReadDate` FROM `fsrecords` WHERE"
                     " `FileId` IS {} NULL")
 _DIR_PARENT_SELECT = ("SELECT `ParentId`, `Name` FROM `fsrecords` "
                       "WHERE `ROWID` = ?")
+_DIRS_PARENT_SELECT = ("SELECT `ROWID`, `ParentId`, `Name` FROM `fsrecords` "
+                       "WHERE `ROWID` IN " + _JSON_LIST)
 _FSDIR_INSERT = ("INSERT INTO `fsrecords` (`Name`, `ParentId`, `DiskId`) "
                  "VALUES (?, ?, ?)")
 _FSFILE_INSERT = ("INSERT INTO `fsrecords` (`Name`, `ParentId`, `DiskId`, "
@@ -32,15 +39,23 @@ _FSFILE_INSERT = ("INSERT INTO `fsrecords` (`Name`, `ParentId`, `DiskId`, "
 _FSFILE_UPDATE = ("UPDATE `fsrecords` SET `FileDate` = ?, `FileId` = ?, "
                   "`SHA1ReadDate` = ? WHERE `ROWID` = ?")
 _DIR_CLEAN = ("DELETE FROM `fsrecords` WHERE `DiskId` = ? AND"
-              " `ParentId` = ? AND `FileId` IS {} NULL")
-_DIR_CLEAN_NAMES = " AND `Name` NOT IN (?"
-_FSFILE_DELETE = ("DELETE FROM `fsrecords` WHERE `ROWID` IN (?")
-_FS_ORFANS_SELECT = ("SELECT `child`.`ROWID`, `child`.`Name`, `parent`.`Name` "
-                     "FROM `fsrecords` AS `child` "
-                     "LEFT JOIN `fsrecords` AS `parent` "
-                     "ON `parent`.ROWID = `child`.`ParentId` "
-                     "WHERE `child`.`ParentId` IS NOT NULL "
-                     "ORDER BY `child`.`ROWID`")
+              " `ParentId` = ? AND `FileId` IS {} NULL"
+              " AND `Name` NOT IN " + _JSON_LIST)
+# Orfans with missing parent and all their descendants
+_FS_ORFANS_TREE = ("WITH RECURSIVE `orfans`(`id`) AS ("
+                   "SELECT `child`.`ROWID` FROM `fsrecords` AS `child` "
+                   "LEFT JOIN `fsrecords` AS `parent` "
+                   "ON `parent`.ROWID = `child`.`ParentId` "
+                   "WHERE `child`.`ParentId` IS NOT NULL "
+                   "AND `parent`.`ROWID` IS NULL "
+                   "UNION SELECT `fsrecords`.`ROWID` FROM `fsrecords` "
+                   "INNER JOIN `orfans` "
+                   "ON `fsrecords`.`ParentId` = `orfans`.`id`) ")
+_FS_ORFANS_SELECT = (_FS_ORFANS_TREE +
+                     "SELECT `ROWID`, `Name`, `ParentId` FROM `fsrecords` "
+                     "WHERE `ROWID` IN `orfans` ORDER BY `ROWID`")
+_FS_ORFANS_DELETE = (_FS_ORFANS_TREE +
+                     "DELETE FROM `fsrecords` WHERE `ROWID` IN `orfans`")
 
 _FILE_SELECT = ("SELECT `ROWID`, `EarliestDate`, `CanonicalName`, "
                 "`CanonicalType`, `MediaType` FROM `files` WHERE `SHA1` = ?")
@@ -58,7 +73,7 @@ _FILE_ORFANS_SELECT = ("SELECT `files`.`ROWID`,`CanonicalName`, "
                        "GROUP BY `files`.`ROWID`, `CanonicalName`, "
                        "`CanonicalType`, `EarliestDate`, `SHA1`, `FileSize`"
                        "ORDER BY `ref_count`, `files`.`ROWID`")
-_FILE_DELETE = ("DELETE FROM `files` WHERE `ROWID` IN (?")
+_FILE_DELETE = "DELETE FROM `files` WHERE `ROWID` IN " + _JSON_LIST
 
 _FS_FILE_SELECT = ("SELECT `fsrecords`.`ROWID`, `fsrecords`.`SHA1ReadDate`, "
                    "`fsrecords`.`FileDate`, `files`.`ROWID`, "
@@ -68,7 +83,8 @@ _FS_FILE_SELECT = ("SELECT `fsrecords`.`ROWID`, `fsrecords`.`SHA1ReadDate`, "
                    " WHERE `DiskId` = ? AND `ParentId` = ? AND `Name` = ?"
                    " AND `FileId` IS NOT NULL")
 _SELECT_SUBDIRS = ("SELECT `ROWID`, `Name`, `ParentId` FROM `fsrecords` "
-                   "WHERE `ParentId` IN(?{}) AND `FileId` IS NULL "
+                   "WHERE `ParentId` IN " + _JSON_LIST +
+                   " AND `FileId` IS NULL "
                    "ORDER BY `ParentId`, `Name`")
 
 
@@ -76,8 +92,9 @@ class FileManagerDatabase(SQLite3connection):
     """Representation of fileManager database and relevant queries."""
 
     def __init__(
-            self, db_path: Path, rehash_time: float):
-        super().__init__(db_path)
+            self, db_path: Union[Path, str], rehash_time: float,
+            uri: bool = False):
+        super().__init__(db_path, uri=uri)
         self._rehash_time = rehash_time
         # Details on current disk
         self._disk_id: int = 0
@@ -118,7 +135,7 @@ class FileManagerDatabase(SQLite3connection):
         """Searching for orfans in files."""
         orfans_count = 0
         orfans_list = []
-        for row in self._exec_query(_FILE_ORFANS_SELECT, (), commit=False):
+        for row in self._exec_query(_FILE_ORFANS_SELECT, ()):
             if not row[6]:
                 logging.warning(
                     f"Found orpfan file {row[1]}.{row[2]} size {row[3]}, SHA1 "
@@ -128,29 +145,22 @@ class FileManagerDatabase(SQLite3connection):
                 orfans_count += 1
         if orfans_list:
             self._exec_query(
-                _FILE_DELETE + ", ?" * (len(orfans_list) - 1) + ")",
-                tuple(orfans_list), commit=True)
+                _FILE_DELETE, (json.dumps(orfans_list),))
         return orfans_count
 
     def remove_fsrecords_orfans(self) -> int:
-        """Removes one level of fsrecords orfans."""
+        """Removes fsrecords orfans together with their subtrees."""
         orfans_count = 0
-        orfans_list = []
-        for row in self._exec_query(_FS_ORFANS_SELECT, (), commit=False):
-            if row[2] is None:
-                logging.warning(f"Found fsrecors file {row} to be deleted")
-                orfans_list.append(row[0])
-                orfans_count += 1
-        if orfans_list:
-            logging.warning(f"remove_fsrecords_orfans: {orfans_list}")
-            self._exec_query(
-                _FSFILE_DELETE + ", ?" * (len(orfans_list) - 1) + ")",
-                tuple(orfans_list), commit=True)
+        for row in self._exec_query(_FS_ORFANS_SELECT, ()):
+            logging.warning(f"Found fsrecors file {row} to be deleted")
+            orfans_count += 1
+        if orfans_count:
+            self._exec_query(_FS_ORFANS_DELETE, ())
         return orfans_count
 
     def set_disk(self, uuid: str, size: int, label: str) -> None:
         """Create/update disk details in DB."""
-        for row in self._exec_query(_DISK_SELECT, (uuid, uuid), commit=False):
+        for row in self._exec_query(_DISK_SELECT, (uuid, uuid)):
             self._set_disk(row[0], row[1], size, label)
             # TODO: support free disk space tracking in DB
             if row[2] != size or row[3] != label:
@@ -166,7 +176,7 @@ class FileManagerDatabase(SQLite3connection):
             self.set_disk(uuid, size, label)
 
     def set_disk_by_name(self, name: str) -> None:
-        for row in self._exec_query(_DISK_SELECT, (name, name), commit=False):
+        for row in self._exec_query(_DISK_SELECT, (name, name)):
             self._set_disk(row[0], row[1], row[2], row[3])
             self.set_top_dir()
             break
@@ -183,7 +193,7 @@ class FileManagerDatabase(SQLite3connection):
         if not self._disk_id:
             raise ValueError("Missing _disk_id")
         for row in self._exec_query(
-                _TOP_DIR_SELECT, (self._disk_id,), commit=False):
+                _TOP_DIR_SELECT, (self._disk_id,)):
             self._top_dir_id = row[0]
             self._id_cache[self._disk_id] = {'': self._top_dir_id}
             break
@@ -204,8 +214,7 @@ class FileManagerDatabase(SQLite3connection):
             raise ValueError("Missing _disk_id")
         for row in self._exec_query(
                 _FSRECORD_SELECT.format("NOT" if is_file else ""),
-                (self._disk_id, parent_id, fsrecord_name),
-                commit=False):
+                (self._disk_id, parent_id, fsrecord_name)):
             logging.debug("get_fsrecord_id: %s, parent %r = %r, is_file=%r",
                           fsrecord_name, parent_id, row[0], is_file)
             return row[0]
@@ -245,30 +254,45 @@ class FileManagerDatabase(SQLite3connection):
                 self._save_path_cache(cur_path_id, cur_path)
         return cur_path_id
 
+    def _build_path(
+            self, fsrecord_id: int, parent_id: Optional[int], name: str
+            ) -> str:
+        """Builds and caches path of fsrecord from its parent and name."""
+        if parent_id == fsrecord_id:
+            raise ValueError(f"Parent query returned parent {parent_id} for "
+                             f"{fsrecord_id}")
+        if parent_id is None or not name:
+            fsrecord_path = ""
+        else:
+            parent_path = self.get_path(parent_id)
+            if parent_path:
+                fsrecord_path = f"{parent_path}/{name}"
+            else:
+                fsrecord_path = name
+        self._save_path_cache(fsrecord_id, fsrecord_path)
+        return fsrecord_path
+
     def get_path(self, fsrecord_id: int) -> str:
         """Returns path of given fsrecord_id."""
         cached_path = self._path_cache.get(fsrecord_id)
-        if cached_path:
+        if cached_path is not None:  # Top dir path is empty string
             return cached_path
         for row in self._exec_query(
-                _DIR_PARENT_SELECT, (fsrecord_id,), commit=False):
-            if row[0] == fsrecord_id:
-                raise ValueError(f"Parent query returned parent {row[0]} for "
-                                 f"{fsrecord_id}")
-            if row[0] is None or not row[1]:
-                fsrecord_path = ""
-                break
-            parent_path = self.get_path(row[0])
-            if parent_path:
-                fsrecord_path = f"{parent_path}/{row[1]}"
-            else:
-                fsrecord_path = row[1]
-            break
-        else:
-            raise ValueError(f"Failed to find path for {fsrecord_id}")
-
-        self._save_path_cache(fsrecord_id, fsrecord_path)
-        return fsrecord_path
+                _DIR_PARENT_SELECT, (fsrecord_id,)):
+            return self._build_path(fsrecord_id, row[0], row[1])
+        raise ValueError(f"Failed to find path for {fsrecord_id}")
+
+    def get_paths(self, fsrecord_ids: List[int]) -> Dict[int, str]:
+        """Returns paths of given fsrecord_ids, missing in cache are
+            queried with single query."""
+        missing_ids = [fsrecord_id for fsrecord_id in fsrecord_ids
+                       if fsrecord_id not in self._path_cache]
+        if missing_ids:
+            for row in self._exec_query(
+                    _DIRS_PARENT_SELECT, (json.dumps(missing_ids),)):
+                self._build_path(row[0], row[1], row[2])
+        return {fsrecord_id: self.get_path(fsrecord_id)
+                for fsrecord_id in fsrecord_ids}
 
     def query_subdirs(self, dir: int, recursively: bool = False) -> List[int]:
         """Queries files of given pair of dirs."""
@@ -277,8 +301,7 @@ class FileManagerDatabase(SQLite3connection):
         while parents:
             next_parents = []
             for row in self._exec_query(
-                    _SELECT_SUBDIRS.format(",?" * (len(parents) - 1)),
-                    parents, commit=False):
+                    _SELECT_SUBDIRS, (json.dumps(parents),)):
                 subdirs.append(row[0])
                 if recursively:
                     next_parents.append(row[0])
@@ -300,11 +323,9 @@ class FileManagerDatabase(SQLite3connection):
         """Deleting from DB files/subdirs missing in names list."""
         if not self._cur_dir_id:
             raise ValueError("Missing _cur_dir_id")
-        clean_sql = _DIR_CLEAN.format("NOT" if is_files else "")
-        if names:
-            clean_sql += _DIR_CLEAN_NAMES + ", ?" * (len(names) - 1) + ")"
         self._exec_query(
-            clean_sql, tuple([self._disk_id, self._cur_dir_id] + names))
+            _DIR_CLEAN.format("NOT" if is_files else ""),
+            (self._disk_id, self._cur_dir_id, json.dumps(names)))
 
     def get_db_file_info(self, file_name: str) -> Tuple[
             int, float, float, int, int, str]:
@@ -318,14 +339,13 @@ class FileManagerDatabase(SQLite3connection):
                 `files`.`SHA1`
         """
         for row in self._exec_query(
-                _FS_FILE_SELECT, (self._disk_id, self._cur_dir_id, file_name),
-                commit=False):
+                _FS_FILE_SELECT, (self._disk_id, self._cur_dir_id, file_name)):
             return row[0], row[1], row[2], row[3], row[4], row[5]
         return 0, 0, 0, 0, 0, ""
 
     def select_file_id(self, sha1: str, mtime: float) -> int:
         """Selects file_id (files.ROWID) by SHA, updates mtime if needed."""
-        for row in self._exec_query(_FILE_SELECT, (sha1,), commit=False):
+        for row in self._exec_query(_FILE_SELECT, (sha1,)):
             if row[1] > mtime:
                 self._exec_query(_FILE_TIME_UPDATE, (mtime, mtime, row[0]))
             return row[0]
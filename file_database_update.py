@@ -1,42 +1,56 @@
 """File database update module."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from time import CLOCK_MONOTONIC, clock_gettime_ns
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import file_utils
 from file_database import FileManagerDatabase
 
-_MAX_ORFAN_SEARCH_DEPTH = 256
+# SHA1 is computed with GIL released, few readers keep HDDs from seeking
+_MAX_HASH_WORKERS = 4
 
 
 class FileDatabaseUpdater(FileManagerDatabase):
-    def update_file(self, file_full_name: str) -> Tuple[int, int, int]:
-        """Updates or inserts in DB details on file.
-            Returns hashed size, file size, hash time in ns."""
+    def _check_file(self, file_full_name: str) -> Tuple[
+            Tuple[int, float, float, int, int, str], int, bool]:
+        """Compares file in current dir with its details in DB.
+            Returns DB details, file size and if file has to be re-hashed."""
         if not self._cur_dir_id:
             raise ValueError("Missing _cur_dir_id")
-        (
-            fsrecord_id, sha1_read_date, db_file_mtime, file_id, db_file_size,
-            db_file_sha1
-        ) = self.get_db_file_info(file_full_name)
-        file_path = self._cur_dir_path / file_full_name
-        file_name, file_type, size, mtime, _, _ = file_utils.read_file(
-                file_path, False)
-        if (self._rehash_time < sha1_read_date and
-                db_file_size == size and db_file_mtime == mtime):
-            return 0, size, 0   # Current file details matching DB, no re-hash
+        db_file_info = self.get_db_file_info(file_full_name)
+        _, sha1_read_date, db_file_mtime, _, db_file_size, _ = db_file_info
+        _, _, size, mtime, _, _ = file_utils.read_file(
+                self._cur_dir_path / file_full_name, False)
+        up_to_date = (self._rehash_time < sha1_read_date and
+                      db_file_size == size and db_file_mtime == mtime)
+        return db_file_info, size, not up_to_date
+
+    def _hash_file(
+            self, file_full_name: str
+            ) -> Tuple[str, str, int, float, str, int]:
+        """Reads details with SHA1 of file in current dir, DB is not used."""
+        return file_utils.read_file(self._cur_dir_path / file_full_name, True)
 
-        file_name, file_type, size, mtime, sha1, hash_time = (
-            file_utils.read_file(file_path, True))
+    def _save_file(
+            self, file_full_name: str,
+            db_file_info: Tuple[int, float, float, int, int, str],
+            file_info: Tuple[str, str, int, float, str, int]
+            ) -> Tuple[int, int, int]:
+        """Updates or inserts in DB details on hashed file.
+            Returns hashed size, file size, hash time in ns."""
+        fsrecord_id, _, _, file_id, _, db_file_sha1 = db_file_info
+        file_name, file_type, size, mtime, sha1, hash_time = file_info
         if not sha1:
             logging.warning(f"Failed to get SHA1 for {file_full_name}, "
                             f"SHA1 in DB {db_file_sha1}, skipped update of "
                             f"fsrecord_id={fsrecord_id}")
             return 0, size, 0   # Skip file if unable to read
 
-        logging.debug(f"Update fsrecord {fsrecord_id} from {file_path}, "
+        logging.debug(f"Update fsrecord {fsrecord_id} from "
+                      f"{self._cur_dir_path / file_full_name}, "
                       f"SHA1={sha1}, {size} B, {file_name} {file_type}")
         new_file_id = self.select_update_file_record(
             sha1, mtime, size, file_name, file_type
@@ -46,22 +60,67 @@ class FileDatabaseUpdater(FileManagerDatabase):
         del file_id
         return size, size, hash_time
 
-    def update_files(self, files: List[str]) -> Tuple[int, int, int]:
-        """Updating files in current dir.
+    def update_file(self, file_full_name: str) -> Tuple[int, int, int]:
+        """Updates or inserts in DB details on file.
             Returns hashed size, file size, hash time in ns."""
-        hashed_size = 0
-        total_size = 0
-        total_hash_time = 0
+        db_file_info, size, needs_hash = self._check_file(file_full_name)
+        if not needs_hash:
+            return 0, size, 0   # Current file details matching DB, no re-hash
+        return self._save_file(
+            file_full_name, db_file_info, self._hash_file(file_full_name))
+
+    def _hash_files(self, files: List[str]) -> Tuple[
+            List[Tuple[str, Tuple[int, float, float, int, int, str],
+                       int, bool]],
+            Dict[str, Tuple[str, str, int, float, str, int]], int]:
+        """Checks files in current dir with DB, hashes in parallel files
+            needing it. Only reads DB, so holds no write lock while hashing.
+            Returns check results, details of hashed files by name and
+            wall clock hash time in ns."""
+        checked_files = []
         for file_name in files:
             if (self._cur_dir_path / file_name).is_symlink():
                 logging.warning("update_files called for symlink %s",
                                 self._cur_dir_path / file_name)
                 continue
-            hashsed, size, hash_time = self.update_file(file_name)
-            hashed_size += hashsed
+            checked_files.append((file_name, *self._check_file(file_name)))
+
+        hash_list = [file_name for file_name, _, _, needs_hash
+                     in checked_files if needs_hash]
+        hashed_files = {}
+        hash_time = 0
+        if hash_list:
+            # Wall clock time, hash times of workers overlap
+            start_time = clock_gettime_ns(CLOCK_MONOTONIC)
+            with ThreadPoolExecutor(_MAX_HASH_WORKERS) as executor:
+                hashed_files = dict(zip(
+                    hash_list, executor.map(self._hash_file, hash_list)))
+            hash_time = clock_gettime_ns(CLOCK_MONOTONIC) - start_time
+        return checked_files, hashed_files, hash_time
+
+    def _save_files(
+            self,
+            checked_files: List[Tuple[
+                str, Tuple[int, float, float, int, int, str], int, bool]],
+            hashed_files: Dict[str, Tuple[str, str, int, float, str, int]]
+            ) -> Tuple[int, int]:
+        """Saves in DB details on files checked and hashed by _hash_files.
+            Returns hashed size, file size."""
+        hashed_size = 0
+        total_size = 0
+        for file_name, db_file_info, size, needs_hash in checked_files:
+            if needs_hash:
+                hashsed, size, _ = self._save_file(
+                    file_name, db_file_info, hashed_files[file_name])
+                hashed_size += hashsed
             total_size += size
-            total_hash_time += hash_time
-        return hashed_size, total_size, total_hash_time
+        return hashed_size, total_size
+
+    def update_files(self, files: List[str]) -> Tuple[int, int, int]:
+        """Updating files in current dir, hashing files in parallel.
+            Returns hashed size, file size, wall clock hash time in ns."""
+        checked_files, hashed_files, hash_time = self._hash_files(files)
+        return (*self._save_files(checked_files, hashed_files), hash_time)
 
     def print_statistic(
                 self, path: Path, start_time_ns: int,
@@ -103,10 +162,15 @@ class FileDatabaseUpdater(FileManagerDatabase):
         files_count = len(files)
         logging.info("update_dir: %s, %d files, %d sub dirs",
                      dir_path, len(files), len(sub_dirs))
-        self.clean_cur_dir(files, is_files=True)
-        self.clean_cur_dir(sub_dirs, is_files=False)
-        files_hashed_size, files_total_size, files_hash_time_ns = (
-            self.update_files(files))
+        checked_files, hashed_files, files_hash_time_ns = (
+            self._hash_files(files))
+        # One transaction per dir for DB writes only, it takes the write
+        # lock, so hashing is done before it to let other writers in
+        with self.transaction():
+            self.clean_cur_dir(files, is_files=True)
+            self.clean_cur_dir(sub_dirs, is_files=False)
+            files_hashed_size, files_total_size = self._save_files(
+                checked_files, hashed_files)
 
         if max_depth != 0:
             for sub_dir_name in sub_dirs:
@@ -132,10 +196,6 @@ class FileDatabaseUpdater(FileManagerDatabase):
 
     def handle_orfans(self, clear_orfan_files: bool = False):
         """Removes fsrecords and file orfans."""
-        for i in range(_MAX_ORFAN_SEARCH_DEPTH):
-            count = self.remove_fsrecords_orfans()
-            logging.info(f"handle_orfans: Round {i} removed "
-                         f"{count} orfans from fsrecords")
-            if not count:
-                break
+        count = self.remove_fsrecords_orfans()
+        logging.info(f"handle_orfans: removed {count} orfans from fsrecords")
         self.handle_file_orfans(clear_orfan_files=clear_orfan_files)
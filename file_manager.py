@@ -77,7 +77,7 @@ class FileUtils(FileManagerDatabase):
                  if cal_size else _DISKS_SELECT)
         disks = []
         for row in self._exec_query(
-                query, id_list if id_list else (), commit=False):
+                query, id_list if id_list else ()):
             if filter and filter not in row[1:3]:
                 continue
             row = list(row)
@@ -100,7 +100,7 @@ class FileUtils(FileManagerDatabase):
             params.extend(subdirs)
         files_list = []
         for row in self._exec_query(
-                _BACKUP_COUNT.format(extra_query), params, commit=False):
+                _BACKUP_COUNT.format(extra_query), params):
             files_list.append([
                 self.get_path(row[1]), row[0], row[7], row[3], row[8]])
         headers = [f"Path on disk {self._disk_label}",
@@ -144,8 +144,7 @@ class FileUtils(FileManagerDatabase):
             _DISK_UPDATE_SIZE,
             (int(disk_info["fssize"]) // 1024,
              disk_info["label"],
-             disks_list[0][0]),
-            commit=True)
+             disks_list[0][0]))
 
     def unique_files(self, filter: str, sort_by: str) -> None:
         disks_list = self.query_disks(filter)
@@ -175,7 +174,7 @@ class FileUtils(FileManagerDatabase):
         print_table(sorted(unique_files, key=lambda info: info[sort_idx]),
                     headers)
 
-        for row in self._exec_query(_UNIQUE_FILES_SIZE, (), commit=False):
+        for row in self._exec_query(_UNIQUE_FILES_SIZE, ()):
             print(f"Total size of unique files is {row[0]} MiB")
 
     def list_dir(
@@ -192,7 +191,7 @@ class FileUtils(FileManagerDatabase):
         files_count = 0
         subdir_count = 0
         for row in self._exec_query(
-                _DIR_LIST_SELECT, (self._cur_dir_id,), commit=False):
+                _DIR_LIST_SELECT, (self._cur_dir_id,)):
             dir_content.append(row)
             dir_size += int(row[5]) if row[5] else 0
             if row[5]:
@@ -263,8 +262,7 @@ class FileUtils(FileManagerDatabase):
 
         if not dry_run and move(src_path, dst_path) == dst_path:
             self._exec_query(
-                    _MOVE_FS_RECORD, (dst_parent_id, dst_path.name, object_id),
-                    commit=True)
+                    _MOVE_FS_RECORD, (dst_parent_id, dst_path.name, object_id))
         elif dry_run:
             logging.info(f"Dry run, DB parent undate {parent_id}->"
                          f"{dst_parent_id}, name {dst_path.name} for fsrecord "
@@ -3,6 +3,7 @@
 import hashlib
 import json
 import logging
+import os
 import subprocess
 import sys
 from pathlib import Path
@@ -68,31 +69,40 @@ def get_path_disk_info(dir_path: Path) -> Dict[str, Any]:
 
 def read_dir(dir_path: Path) -> Tuple[List[str], List[str]]:
     """Reading details of files and subdirs."""
+    files = []
+    dirs = []
     try:
-        files = sorted([file.name for file in dir_path.iterdir()
-                        if file.is_file() and not file.is_symlink()])
-        dirs = sorted([dir.name for dir in dir_path.iterdir()
-                       if dir.is_dir() and not dir.is_symlink() and
-                       dir.name not in _IGNORED_DIRS])
-        logging.debug(f"read_dir({dir_path}) dirs: {dirs}, files: {files}")
-        return files, dirs
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    files.append(entry.name)
+                elif (entry.is_dir(follow_symlinks=False) and
+                        entry.name not in _IGNORED_DIRS):
+                    dirs.append(entry.name)
     except PermissionError:
         logging.exception(f"read_dir failed to read {dir_path}")
         return [], []
+    files.sort()
+    dirs.sort()
+    logging.debug(f"read_dir({dir_path}) dirs: {dirs}, files: {files}")
+    return files, dirs
 
 
 def generate_file_sha1(
         file_path: Path, blocksize: int = 2**20) -> Tuple[str, int]:
     """Safe way to get SHA1 for big files."""
     sha1_hash = hashlib.sha1()
+    # Same loop as hashlib.file_digest: unbuffered reads into reused buffer
+    buffer = bytearray(blocksize)
+    view = memoryview(buffer)
     start_time = clock_gettime_ns(CLOCK_MONOTONIC)
     try:
-        with open(file_path, 'rb') as file_handler:
+        with open(file_path, 'rb', buffering=0) as file_handler:
             while True:
-                buffer = file_handler.read(blocksize)
-                if not buffer:
+                read_size = file_handler.readinto(buffer)
+                if not read_size:
                     break
-                sha1_hash.update(buffer)
+                sha1_hash.update(view[:read_size])
     except PermissionError:
         logging.exception(f"generate_file_sha1 failed to read {file_path}")
         return "", 0
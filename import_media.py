@@ -10,7 +10,7 @@ from pathlib import Path
 
 import exifread
 
-from utils import float2timestamp, timeobj2exif_str
+from utils import float2timestamp, setup_logging, timeobj2exif_str
 
 _COMPARE_TIME_DIFF = timedelta(2)  # 2 days
 
@@ -24,8 +24,10 @@ class IterateDir(Exception):
 
 
 def file_type_from_name(file_name):
-    """Returns file's extension."""
-    return os.path.splitext(file_name)[1][1:].lower()
+    """Returns file's extension, same as os.path.splitext would."""
+    base_name = os.fspath(file_name).rpartition(os.sep)[2]
+    _, dot, file_type = base_name.lstrip(".").rpartition(".")
+    return file_type.lower() if dot else ""
 
 
 def exif_time2unix(exif_time):
@@ -374,13 +376,8 @@ def main():
     arg_parser.add_argument('-v', '--verbose',
                             help='Print verbose output',
                             action='count', default=0)
-    arg_parser.add_argument('--dry_run',
-                            help='Print action instead of executing it',
-                            action="store_true", default=False)
     args = arg_parser.parse_args()
-    logging.basicConfig(
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        level=logging.WARNING - 10 * (args.verbose if args.verbose < 3 else 2))
+    setup_logging(args.verbose)
     if args.action == 'import':
         import_action(args)
     elif args.action == 'print_time':
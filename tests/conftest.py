@@ -0,0 +1,171 @@
+import hashlib
+import mmap
+import os
+import shutil
+import sys
+from io import RawIOBase
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pytest
+
+from db_utils import UNSAFE_PRAGMAS_ENV, create_db, dump_db
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+DB_SCHEMA = SCRIPT_DIR.parent / "fileManager_schema.sql"
+DB_TEST_DB_DUMP = SCRIPT_DIR.parent / "fileManager_test_dump.sql"
+TEST_DATA_DIR = SCRIPT_DIR.parent / "test_data"
+
+
+def copy_db(src: Path, dst: Path) -> None:
+    """Copies DB file with copy_file_range, which shares extents instead of
+        copying data on reflink capable filesystems (btrfs, XFS)."""
+    try:
+        with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+            remaining = os.fstat(src_file.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(
+                    src_file.fileno(), dst_file.fileno(), remaining)
+                if not copied:
+                    break
+                remaining -= copied
+    except (AttributeError, OSError):
+        # No copy_file_range on this platform or filesystem
+        shutil.copyfile(src, dst)
+
+
+def cached_db(
+        config: pytest.Config, tmp_path_factory: pytest.TempPathFactory,
+        db_dump: Path) -> Path:
+    """DB created from db_dump, cached across runs in pytest cache
+        by SHA1 of the dump. Created in session tmp dir if cacheprovider
+        plugin is disabled."""
+    if getattr(config, "cache", None) is None:
+        db_path = tmp_path_factory.mktemp("db") / f"{db_dump.stem}.db"
+        create_db(db_path, db_dump)
+        return db_path
+    dump_sha1 = hashlib.sha1(db_dump.read_bytes()).hexdigest()
+    cache_path = config.cache.mkdir("fileManager-db") / f"{dump_sha1}.db"
+    if not cache_path.exists():
+        # Atomic replace, xdist workers may race on the cache
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        create_db(tmp_path, db_dump)
+        os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def pytest_addoption(parser) -> None:
+    parser.addoption(
+        "--keep-dumps", action="store_true", default=False,
+        help="Save SQL dumps of DBs created by tests into their tmp_path")
+
+
+@pytest.fixture
+def keep_dump(request, tmp_path: Path) -> Callable[[Path, str], None]:
+    """Dumps DB to tmp_path/dump_name, only if --keep-dumps is given."""
+    def dump(db_path: Path, dump_name: str) -> None:
+        if request.config.getoption("--keep-dumps"):
+            dump_db(db_path, tmp_path / dump_name)
+    return dump
+
+
+def _mmap_sha1(file: RawIOBase) -> str:
+    """SHA1 of file hashed straight from page cache via mmap."""
+    sha1_hash = hashlib.sha1()
+    try:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                sha1_hash.update(view)
+    except ValueError:
+        # Zero-length file can not be mapped, nothing to hash
+        pass
+    return sha1_hash.hexdigest()
+
+
+@pytest.fixture(scope="session")
+def ref_sha1() -> Callable[[Path], str]:
+    """Reference SHA1 of file, hashlib.file_digest on Python 3.11+."""
+    def file_sha1(file_path: Path) -> str:
+        with open(file_path, "rb", buffering=0) as file:
+            if sys.version_info >= (3, 11):
+                return hashlib.file_digest(file, "sha1").hexdigest()
+            return _mmap_sha1(file)
+    return file_sha1
+
+
+@pytest.fixture(scope="session")
+def test_data_dir() -> Path:
+    """Root of test_data files shipped with repo."""
+    return TEST_DATA_DIR
+
+
+@pytest.fixture(scope="session")
+def test_data_sha1(
+        request,
+        test_data_dir: Path,
+        ref_sha1: Callable[[Path], str]) -> Dict[Path, str]:
+    """Reference SHA1 of test_data files, cached across runs in pytest cache.
+        File is rehashed only when its size or mtime changed.
+        Every file is hashed if cacheprovider plugin is disabled."""
+    config_cache = getattr(request.config, "cache", None)
+    cache: Dict[str, List] = {}
+    if config_cache is not None:
+        cache = config_cache.get("fileManager/sha1", {})
+    sha1_table: Dict[Path, str] = {}
+    updated = False
+    for file_path in sorted(test_data_dir.rglob("*")):
+        if not file_path.is_file():
+            continue
+        file_stat = file_path.stat()
+        file_key = [file_stat.st_size, file_stat.st_mtime_ns]
+        cached = cache.get(str(file_path))
+        if not cached or cached[:2] != file_key:
+            cached = file_key + [ref_sha1(file_path)]
+            cache[str(file_path)] = cached
+            updated = True
+        sha1_table[file_path] = cached[2]
+    if updated and config_cache is not None:
+        config_cache.set("fileManager/sha1", cache)
+    return sha1_table
+
+
+@pytest.fixture(autouse=True)
+def unsafe_db_pragmas(monkeypatch) -> None:
+    """Test DBs are disposable, skip fsync and on-disk journal for them."""
+    monkeypatch.setenv(UNSAFE_PRAGMAS_ENV, "1")
+
+
+@pytest.fixture(scope="session")
+def reference_db_template(pytestconfig, tmp_path_factory) -> Path:
+    """Reference DB copied once per session, per xdist worker base temp.
+        Must not be modified, tests only reading DB may use it directly."""
+    db_path = tmp_path_factory.mktemp("template") / "reference.db"
+    copy_db(
+        cached_db(pytestconfig, tmp_path_factory, DB_TEST_DB_DUMP), db_path)
+    return db_path
+
+
+@pytest.fixture
+def reference_db(tmp_path: Path, reference_db_template: Path) -> Path:
+    """Test owned copy of the reference DB."""
+    db_path = tmp_path / "reference.db"
+    copy_db(reference_db_template, db_path)
+    return db_path
+
+
+@pytest.fixture(scope="session")
+def schema_db_template(pytestconfig, tmp_path_factory) -> Path:
+    """Empty DB with schema copied once per session."""
+    db_path = tmp_path_factory.mktemp("template") / "schema.db"
+    copy_db(
+        cached_db(pytestconfig, tmp_path_factory, DB_SCHEMA), db_path)
+    return db_path
+
+
+@pytest.fixture
+def schema_db(tmp_path: Path, schema_db_template: Path) -> Path:
+    """Test owned copy of the empty DB with schema."""
+    db_path = tmp_path / "test.db"
+    copy_db(schema_db_template, db_path)
+    return db_path
@@ -1,36 +1,106 @@
 import sqlite3
-import sys
 import time
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 
 import pytest
 
-SCRIPT_DIR = Path(__file__).resolve().parent
-TEST_DATA_DIR = SCRIPT_DIR.parent / "test_data"
-sys.path.append(str(SCRIPT_DIR.parent))
+from db_utils import TABLE_SELECT
+from file_database import FileManagerDatabase
 
-from db_utils import TABLE_SELECT, create_db  # noqa: E402
-from file_database import FileManagerDatabase  # noqa: E402
+_MEMORY_DB = ":memory:"
+_MEMORY_DB_URI = "file::memory:?cache=shared"
+_TEST_DISK_UUID = "0a2e2cb7-4543-43b3-a04a-40959889bd45"
+_TEST_DISK_SIZE = 59609420
 
-_DB_TEST_DB_DUMP = SCRIPT_DIR.parent / "fileManager_test_dump.sql"
-_TEST_DB_NAME = "test.db"
 
+@pytest.fixture(scope="module")
+def reference_file_db(
+        reference_db_template: Path) -> Iterator[FileManagerDatabase]:
+    """Shared read-only connection to the reference DB."""
+    with FileManagerDatabase(reference_db_template, time.time()) as db:
+        yield db
 
-def test_error_exec_sql(tmp_path: Path) -> None:
-    with FileManagerDatabase(tmp_path / _TEST_DB_NAME, time.time()) as db:
+
+def reset_caches(db: FileManagerDatabase) -> None:
+    """Drops path caches warmed by previous test and re-selects disk."""
+    db._path_cache.clear()
+    db._id_cache.clear()
+    db.set_disk(_TEST_DISK_UUID, _TEST_DISK_SIZE, "")
+
+
+def test_error_exec_sql() -> None:
+    with FileManagerDatabase(_MEMORY_DB_URI, time.time(), uri=True) as db:
         with pytest.raises(sqlite3.OperationalError):
             db._exec_query(TABLE_SELECT.format("foo", "foo"), ())
 
 
-def test_set_disk_change(tmp_path: Path, mocker) -> None:
-    def mock_exec_query(self, sql: str, params: Tuple, commit=True):
+_DISK_INSERT = ("INSERT INTO `disks` (`UUID`, `DiskSize`, `Label`) "
+                "VALUES (?, ?, ?)")
+_DISK_COUNT = "SELECT COUNT(*) FROM `disks` WHERE `UUID` = ?"
+
+
+def count_disks(db_path: Path, uuid: str) -> int:
+    """Counts disks with uuid, as seen by another connection."""
+    connection = sqlite3.connect(db_path)
+    count = connection.execute(_DISK_COUNT, (uuid,)).fetchone()[0]
+    connection.close()
+    return count
+
+
+def test_write_committed_immediately(schema_db: Path) -> None:
+    with FileManagerDatabase(schema_db, time.time()) as db:
+        db._exec_query(_DISK_INSERT, ("abc", 500, "test-label"))
+        assert count_disks(schema_db, "abc") == 1
+
+
+def test_transaction(schema_db: Path) -> None:
+    with FileManagerDatabase(schema_db, time.time()) as db:
+        with db.transaction():
+            db._exec_query(_DISK_INSERT, ("abc", 500, "test-label"))
+            with db.transaction():
+                db._exec_query(_DISK_INSERT, ("def", 500, "test-label"))
+            assert count_disks(schema_db, "abc") == 0
+        assert count_disks(schema_db, "abc") == 1
+        assert count_disks(schema_db, "def") == 1
+
+        with pytest.raises(ValueError):
+            with db.transaction():
+                db._exec_query(_DISK_INSERT, ("ghi", 500, "test-label"))
+                raise ValueError("Abort transaction")
+        assert count_disks(schema_db, "ghi") == 0
+
+
+def test_exit_closes_on_commit_error(schema_db: Path, mocker) -> None:
+    db = FileManagerDatabase(schema_db, time.time())
+    db._con.execute("BEGIN")
+    db._exec_query(_DISK_INSERT, ("abc", 500, "test-label"))
+    mocker.patch.object(
+        db, "_exec_query",
+        side_effect=sqlite3.OperationalError("database is locked"))
+    with pytest.raises(sqlite3.OperationalError):
+        db.__exit__(None, None, None)
+    with pytest.raises(sqlite3.ProgrammingError):
+        db._con.execute("SELECT 1")
+
+
+def test_exit_rolls_back_on_error(schema_db: Path) -> None:
+    with pytest.raises(ValueError):
+        with FileManagerDatabase(schema_db, time.time()) as db:
+            db._con.execute("BEGIN")
+            db._exec_query(_DISK_INSERT, ("abc", 500, "test-label"))
+            raise ValueError("Abort on exit")
+    assert count_disks(schema_db, "abc") == 0
+
+
+def test_set_disk_change(mocker) -> None:
+    def mock_exec_query(self, sql: str, params: Tuple):
         yield [5, "abc", 500, "test-label"]
 
     mocker.patch(
         "file_database.FileManagerDatabase._exec_query", mock_exec_query)
 
-    with FileManagerDatabase(tmp_path / _TEST_DB_NAME, time.time()) as db:
+    with FileManagerDatabase(_MEMORY_DB, time.time()) as db:
         db.set_disk("abc", 500, "test-label")
         assert db._disk_id == 5
         assert db._disk_uuid == "abc"
@@ -38,14 +108,14 @@ def test_set_disk_change(tmp_path: Path, mocker) -> None:
         assert db._disk_label == "test-label"
 
     with pytest.raises(ValueError) as error_info:
-        with FileManagerDatabase(tmp_path / _TEST_DB_NAME, time.time()) as db:
+        with FileManagerDatabase(_MEMORY_DB, time.time()) as db:
             db.set_disk("abc", 400, "test-label")
         assert (
             error_info ==
             "Disk UUID abc details changed: 500->400, test-label->test-label")
 
     with pytest.raises(ValueError) as error_info:
-        with FileManagerDatabase(tmp_path / _TEST_DB_NAME, time.time()) as db:
+        with FileManagerDatabase(_MEMORY_DB, time.time()) as db:
             db.set_disk("abc", 500, "new-label")
         assert (
             error_info ==
@@ -55,6 +125,12 @@ def test_set_disk_change(tmp_path: Path, mocker) -> None:
 @pytest.mark.parametrize(
     "fsrecord_id, fsrecord_path, dir_cache, id_cache",
     [
+        (
+            1,
+            "",
+            {1: ""},
+            {"": 1}
+        ),
         (
             2,
             "home",
@@ -110,15 +186,13 @@ def test_set_disk_change(tmp_path: Path, mocker) -> None:
     ],
 )
 def test_get_path(
-        tmp_path: Path, fsrecord_id: int, fsrecord_path: str,
-        dir_cache: Dict[int, str], id_cache: Dict[str, int]) -> None:
-    reference_db_path = tmp_path / _TEST_DB_NAME
-    create_db(reference_db_path, _DB_TEST_DB_DUMP)
-    with FileManagerDatabase(reference_db_path, time.time()) as db:
-        db.set_disk("0a2e2cb7-4543-43b3-a04a-40959889bd45", 59609420, "")
-        assert db.get_path(fsrecord_id) == fsrecord_path
-        assert db._path_cache == dir_cache
-        assert db._id_cache[1] == id_cache
+        reference_file_db: FileManagerDatabase, fsrecord_id: int,
+        fsrecord_path: str, dir_cache: Dict[int, str],
+        id_cache: Dict[str, int]) -> None:
+    reset_caches(reference_file_db)
+    assert reference_file_db.get_path(fsrecord_id) == fsrecord_path
+    assert reference_file_db._path_cache == dir_cache
+    assert reference_file_db._id_cache[1] == id_cache
 
 
 @pytest.mark.parametrize(
@@ -130,9 +204,30 @@ def test_get_path(
     ]
 )
 def test_query_subdirs(
-        tmp_path: Path, dir: int, recursive: bool, subdirs: List[int]) -> None:
-    reference_db_path = tmp_path / _TEST_DB_NAME
-    create_db(reference_db_path, _DB_TEST_DB_DUMP)
-    with FileManagerDatabase(reference_db_path, time.time()) as db:
-        db.set_disk("0a2e2cb7-4543-43b3-a04a-40959889bd45", 59609420, "")
-        assert db.query_subdirs(dir, recursive) == subdirs
+        reference_file_db: FileManagerDatabase, dir: int, recursive: bool,
+        subdirs: List[int]) -> None:
+    reset_caches(reference_file_db)
+    assert reference_file_db.query_subdirs(dir, recursive) == subdirs
+
+
+@pytest.mark.parametrize(
+    "fsrecord_ids, paths",
+    [
+        ([2], {2: "home"}),
+        (
+            [7, 14, 20],
+            {
+                7: "home/dimagolov/git/fileManager/test_data/media",
+                14: "home/dimagolov/git/fileManager/test_data/storage",
+                20: "home/dimagolov/git/fileManager/test_data/storage/tagged",
+            }
+        ),
+    ],
+)
+def test_get_paths(
+        reference_file_db: FileManagerDatabase, fsrecord_ids: List[int],
+        paths: Dict[int, str]) -> None:
+    reset_caches(reference_file_db)
+    assert reference_file_db.get_paths(fsrecord_ids) == paths
+    for fsrecord_id, path in paths.items():
+        assert reference_file_db._path_cache[fsrecord_id] == path
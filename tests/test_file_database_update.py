@@ -1,74 +1,99 @@
-import sys
+import sqlite3
+import threading
 import time
 from pathlib import Path
 
 import pytest
 
-SCRIPT_DIR = Path(__file__).resolve().parent
-TEST_DATA_DIR = SCRIPT_DIR.parent / "test_data"
-sys.path.append(str(SCRIPT_DIR.parent))
+from db_utils import compare_db_with_ignores
+from file_database_update import FileDatabaseUpdater
 
-from db_utils import compare_db_with_ignores, create_db, dump_db  # noqa: E402
-from file_database_update import FileDatabaseUpdater  # noqa: E402
+_MEMORY_DB = ":memory:"
+_DISK_INSERT = ("INSERT INTO `disks` (`UUID`, `DiskSize`, `Label`) "
+                "VALUES (?, ?, ?)")
 
-_DB_SCHEMA = SCRIPT_DIR.parent / "fileManager_schema.sql"
-_DB_TEST_DB_DUMP = SCRIPT_DIR.parent / "fileManager_test_dump.sql"
-_REFERENCE_DB_NAME = "reference.db"
-_TEST_DB_NAME = "test.db"
 
-
-def test_update_dir(tmp_path):
-    reference_db_path = tmp_path / _REFERENCE_DB_NAME
-    create_db(reference_db_path, _DB_TEST_DB_DUMP)
-    test_db_path = tmp_path / _TEST_DB_NAME
-    create_db(test_db_path, _DB_SCHEMA)
+def test_update_dir(
+        test_data_dir, reference_db_template, schema_db, keep_dump):
     with FileDatabaseUpdater(
-            test_db_path, time.time()) as new_file_db:
-        new_file_db.update_dir(TEST_DATA_DIR, max_depth=None)
-    dump_db(test_db_path, tmp_path / "test_update_dir.sql")
-    compare_db_with_ignores(reference_db_path, test_db_path)
+            schema_db, time.time()) as new_file_db:
+        new_file_db.update_dir(test_data_dir, max_depth=None)
+    keep_dump(schema_db, "test_update_dir.sql")
+    compare_db_with_ignores(reference_db_template, schema_db)
 
 
-def test_update_dir_no_hash(tmp_path):
-    reference_db_path = tmp_path / _REFERENCE_DB_NAME
-    create_db(reference_db_path, _DB_TEST_DB_DUMP)
-    test_db_path = tmp_path / _TEST_DB_NAME
-    create_db(test_db_path, _DB_SCHEMA)
+def test_update_dir_no_hash(
+        test_data_dir, reference_db_template, schema_db, keep_dump):
     with FileDatabaseUpdater(
-            test_db_path, time.time()) as new_file_db:
-        new_file_db.update_dir(TEST_DATA_DIR, max_depth=None)
+            schema_db, time.time()) as new_file_db:
+        new_file_db.update_dir(test_data_dir, max_depth=None)
     with FileDatabaseUpdater(
-            test_db_path, time.time() - 3600) as new_file_db:
-        new_file_db.update_dir(TEST_DATA_DIR, max_depth=None)
-    dump_db(test_db_path, tmp_path / "test_update_dir_no_hash.sql")
-    compare_db_with_ignores(reference_db_path, test_db_path)
+            schema_db, time.time() - 3600) as new_file_db:
+        new_file_db.update_dir(test_data_dir, max_depth=None)
+    keep_dump(schema_db, "test_update_dir_no_hash.sql")
+    compare_db_with_ignores(reference_db_template, schema_db)
 
 
-def test_update_dir_rerun(tmp_path):
-    reference_db_path = tmp_path / _REFERENCE_DB_NAME
-    create_db(reference_db_path, _DB_TEST_DB_DUMP)
-    test_db_path = tmp_path / _TEST_DB_NAME
-    create_db(test_db_path, _DB_SCHEMA)
+def test_update_dir_rerun(
+        test_data_dir, reference_db_template, schema_db, keep_dump):
     with FileDatabaseUpdater(
-            test_db_path, time.time()) as new_file_db:
-        new_file_db.update_dir(TEST_DATA_DIR, max_depth=None)
+            schema_db, time.time()) as new_file_db:
+        new_file_db.update_dir(test_data_dir, max_depth=None)
     with FileDatabaseUpdater(
-            test_db_path, time.time() + 3600) as new_file_db:
-        new_file_db.update_dir(TEST_DATA_DIR, max_depth=None)
-    dump_db(test_db_path, tmp_path / "test_update_dir_rerun.sql")
-    compare_db_with_ignores(reference_db_path, test_db_path)
+            schema_db, time.time() + 3600) as new_file_db:
+        new_file_db.update_dir(test_data_dir, max_depth=None)
+    keep_dump(schema_db, "test_update_dir_rerun.sql")
+    compare_db_with_ignores(reference_db_template, schema_db)
+
+
+def test_update_dir_write_while_hashing(
+        test_data_dir, schema_db, mocker):
+    hash_file = FileDatabaseUpdater._hash_file
+    # Hashing workers must not lock DB for each other
+    write_lock = threading.Lock()
+
+    def write_and_hash(db, file_full_name):
+        with write_lock:
+            # No busy timeout, fails at once if DB is locked by update_dir
+            connection = sqlite3.connect(schema_db, timeout=0)
+            connection.execute(_DISK_INSERT, (file_full_name, 0, ""))
+            connection.commit()
+            connection.close()
+        return hash_file(db, file_full_name)
+
+    mocker.patch.object(FileDatabaseUpdater, "_hash_file", autospec=True,
+                        side_effect=write_and_hash)
+    with FileDatabaseUpdater(schema_db, time.time()) as file_db:
+        file_db.set_disk("test-uuid", 500, "test-label")
+        file_db.update_dir(test_data_dir / "media", check_disk=False)
+    assert FileDatabaseUpdater._hash_file.call_count == 6
+
+
+def test_update_dir_hash_wall_time(test_data_dir, schema_db, mocker):
+    hash_file = FileDatabaseUpdater._hash_file
+    hour_ns = 3600 * 10**9
+
+    def hash_in_hour(db, file_full_name):
+        # Each file reports an hour of hashing, overlapping the others
+        return (*hash_file(db, file_full_name)[:5], hour_ns)
+
+    mocker.patch.object(FileDatabaseUpdater, "_hash_file", autospec=True,
+                        side_effect=hash_in_hour)
+    with FileDatabaseUpdater(schema_db, time.time()) as file_db:
+        file_db.set_disk("test-uuid", 500, "test-label")
+        _, hashed_size, _, hash_time_ns = file_db.update_dir(
+            test_data_dir / "media", check_disk=False)
+    assert hashed_size
+    assert hash_time_ns < hour_ns
 
 
-def test_delete_dir(tmp_path):
-    reference_db_path = tmp_path / _REFERENCE_DB_NAME
-    create_db(reference_db_path, _DB_TEST_DB_DUMP)
+def test_delete_dir(reference_db, keep_dump):
     with FileDatabaseUpdater(
-            reference_db_path, time.time()) as file_db:
+            reference_db, time.time()) as file_db:
         file_db.set_disk('0a2e2cb7-4543-43b3-a04a-40959889bd45', 59609420, '')
         file_db._exec_query("DELETE FROM `fsrecords` WHERE `Name` = ?",
-                            ("storage",), commit=True)
+                            ("storage",))
         file_db.handle_orfans(clear_orfan_files=True)
-        dump_db(reference_db_path, tmp_path / "test_delete_dir_fsrecors.sql")
         for row in file_db._exec_query(
                 "SELECT COUNT(*) FROM `fsrecords` WHERE `FileId` IS NOT NULL",
                 ()):
@@ -81,14 +106,15 @@ def test_delete_dir(tmp_path):
             break
         else:
             raise ValueError("Failed to count records in `files`")
+    keep_dump(reference_db, "test_delete_dir_fsrecors.sql")
 
 
-def test_error_missing_setup(tmp_path: Path) -> None:
-    with FileDatabaseUpdater(tmp_path / _TEST_DB_NAME, time.time()) as db:
+def test_error_missing_setup(test_data_dir: Path) -> None:
+    with FileDatabaseUpdater(_MEMORY_DB, time.time()) as db:
         with pytest.raises(ValueError):
             db.set_top_dir()
         with pytest.raises(ValueError):
-            db.set_cur_dir(tmp_path)
+            db.set_cur_dir(test_data_dir)
         with pytest.raises(ValueError):
             db.update_file("bar.txt")
         with pytest.raises(ValueError):
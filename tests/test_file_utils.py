@@ -1,22 +1,34 @@
-import sys
-from hashlib import sha1
 from pathlib import Path
 from typing import List
 
 import pytest
 
+from file_utils import (generate_file_sha1, get_full_dir_path, get_mount_path,
+                        get_path_disk_info, get_path_from_mount, read_dir,
+                        read_file)
+
 SCRIPT_DIR = Path(__file__).resolve().parent
-TEST_DATA_DIR = SCRIPT_DIR.parent / "test_data"
-sys.path.append(str(SCRIPT_DIR.parent))
+SLOW_FILE_SIZE = 1 << 20  # Files above default hash block size
+
 
-from file_utils import (generate_file_sha1, get_full_dir_path,  # noqa: E402
-                        get_mount_path, get_path_disk_info,
-                        get_path_from_mount, read_dir, read_file)
+def pytest_generate_tests(metafunc) -> None:
+    """Parametrizes test_data_file with every file of test_data,
+        files larger than SLOW_FILE_SIZE are marked slow."""
+    if "test_data_file" in metafunc.fixturenames:
+        test_data_dir = metafunc.config.rootpath / "test_data"
+        metafunc.parametrize("test_data_file", [
+            pytest.param(
+                path, id=str(path.relative_to(test_data_dir)),
+                marks=(
+                    [pytest.mark.slow]
+                    if path.stat().st_size > SLOW_FILE_SIZE else []))
+            for path in sorted(test_data_dir.rglob("*")) if path.is_file()
+        ])
 
 
-def test_get_full_dir_path():
+def test_get_full_dir_path(test_data_dir):
     assert get_full_dir_path(Path("~")) == Path.home()
-    assert get_full_dir_path(SCRIPT_DIR / "../test_data") == TEST_DATA_DIR
+    assert get_full_dir_path(test_data_dir / "../test_data") == test_data_dir
     assert get_full_dir_path(Path(__file__)) == SCRIPT_DIR
 
 
@@ -80,8 +92,8 @@ def test_get_path_from_mount_real_path():
 @pytest.mark.parametrize(
     "test_path, expected_files, expected_dirs",
     [
-        ("test_data", [], ["media", "storage"]),
-        ("test_data/media",
+        ("", [], ["media", "storage"]),
+        ("media",
          [
              "6TB-2 benchmark 2018-08-25 20-58-29.png",
              "DSC06979.JPG",
@@ -91,34 +103,32 @@ def test_get_path_from_mount_real_path():
              "not_an_image"
          ],
          []),
-        ("test_data/storage",
+        ("storage",
          [
              "DSC06979c.JPG",
              "DSC06979 (copy).JPG",
              "DSC06979.JPG"
          ],
          ["second_dir", "tagged"]),
-        ("test_data/storage/tagged", ["DSC06979.JPG", "IMG_0004.JPG"], []),
-        ("test_data/storage/second_dir", ["foo.txt"], []),
+        ("storage/tagged", ["DSC06979.JPG", "IMG_0004.JPG"], []),
+        ("storage/second_dir", ["foo.txt"], []),
     ],
 )
-def test_read_dir(test_path, expected_files, expected_dirs):
-    files, sub_dirs = read_dir(SCRIPT_DIR.parent / test_path)
-    assert sorted(files) == sorted(expected_files)
-    assert sorted(sub_dirs) == sorted(expected_dirs)
+def test_read_dir(test_data_dir, test_path, expected_files, expected_dirs):
+    files, sub_dirs = read_dir(test_data_dir / test_path)
+    assert len(files) == len(expected_files)
+    assert set(files) == set(expected_files)
+    assert len(sub_dirs) == len(expected_dirs)
+    assert set(sub_dirs) == set(expected_dirs)
 
 
-def test_generate_file_sha1():
-    for file_path in TEST_DATA_DIR.glob("**/*"):
-        print(f"Testing {file_path}")
-        if file_path.is_dir():
-            continue
-        sha1_hash = sha1()
-        sha1_hash.update(file_path.read_bytes())
-        file_sha, _ = generate_file_sha1(file_path, 1024)
-        assert file_sha == sha1_hash.hexdigest()
+@pytest.mark.parametrize("blocksize", [1 << 10, 1 << 16, 1 << 20])
+def test_generate_file_sha1(test_data_sha1, test_data_file, blocksize):
+    file_sha, _ = generate_file_sha1(test_data_file, blocksize)
+    assert file_sha == test_data_sha1[test_data_file]
 
 
+@pytest.mark.parametrize("get_sha1", [True, False])
 @pytest.mark.parametrize(
     "file_path, file_name, file_type, size, sha1_hex",
     [
@@ -146,102 +156,112 @@ def test_generate_file_sha1():
     ],
 )
 def test_read_file(
+        test_data_dir: Path,
         file_path: str,
         file_name: str,
         file_type: str,
         size: int,
-        sha1_hex: str
+        sha1_hex: str,
+        get_sha1: bool
         ) -> None:
     (
         read_file_name, read_file_type, read_size, _, read_sha1, _
-    ) = read_file(TEST_DATA_DIR / file_path, True)
+    ) = read_file(test_data_dir / file_path, get_sha1)
     assert read_file_name == file_name
     assert read_file_type == file_type
     assert read_size == size
-    assert read_sha1 == sha1_hex
-    (
-        read_file_name, read_file_type, read_size, _, read_sha1, _
-    ) = read_file(TEST_DATA_DIR / file_path, False)
-    assert read_file_name == file_name
-    assert read_file_type == file_type
-    assert read_size == size
-    assert read_sha1 == ''
+    assert read_sha1 == (sha1_hex if get_sha1 else '')
+
+
+LSBLK_OUTPUT = {
+    "uuid": b"\n".join([
+        b'{',
+        b'   "blockdevices": [',
+        b'      {',
+        b'         "uuid": "F2FC151BAC04DF13",',
+        b'         "label": "My Backup 8",',
+        b'         "fssize": "6001039241216",',
+        b'         "mountpoint": "/media/user/My Backup 8"',
+        b'      }',
+        b'   ]',
+        b'}',
+        b''
+    ]),
+    "no_uuid": b"\n".join([
+        b'{',
+        b'   "blockdevices": [',
+        b'      {',
+        b'         "uuid": "",',
+        b'         "label": "My Backup 8",',
+        b'         "fssize": "2000397881344",',
+        b'         "mountpoint": "/media/user/My Backup 8"',
+        b'      }',
+        b'   ]',
+        b'}',
+        b''
+    ]),
+    "label": b"\n".join([
+        b'{',
+        b'   "blockdevices": [',
+        b'      {',
+        b'         "uuid": "F2FC151BAC04DF13",',
+        b'         "label": "DISK_LABEL",',
+        b'         "fssize": "2000333307904",',
+        b'         "mountpoint": "/media/user/DISK_LABEL"',
+        b'      }',
+        b'   ]',
+        b'}',
+        b''
+    ]),
+}
+
+
+@pytest.fixture
+def lsblk_output(request, mocker) -> None:
+    """Installs lsblk and mount point mocks for LSBLK_OUTPUT case."""
+    def check_output(cmd: List[str]) -> bytes:
+        assert cmd[0] == "lsblk"
+        return LSBLK_OUTPUT[request.param]
+
+    mocker.patch("subprocess.check_output", check_output)
+    mocker.patch("file_utils.get_mount_path",
+                 lambda p: Path("/".join(str(p).split("/")[:4])))
 
 
 @pytest.mark.parametrize(
-    "dir_path, lsblk_info, uuid, label, size",
+    "lsblk_output, dir_path, uuid, label, size",
     [
         (
+            "uuid",
             Path("/media/user/My Backup 8/data"),
-            b"\n".join([
-                b'{',
-                b'   "blockdevices": [',
-                b'      {',
-                b'         "uuid": "F2FC151BAC04DF13",',
-                b'         "label": "My Backup 8",',
-                b'         "fssize": "6001039241216",',
-                b'         "mountpoint": "/media/user/My Backup 8"',
-                b'      }',
-                b'   ]',
-                b'}',
-                b''
-            ]),
             "F2FC151BAC04DF13",
             "My Backup 8",
             5860389884,
         ),
         (
+            "no_uuid",
             Path("/media/user/My Backup 8/data"),
-            b"\n".join([
-                b'{',
-                b'   "blockdevices": [',
-                b'      {',
-                b'         "uuid": "",',
-                b'         "label": "My Backup 8",',
-                b'         "fssize": "2000397881344",',
-                b'         "mountpoint": "/media/user/My Backup 8"',
-                b'      }',
-                b'   ]',
-                b'}',
-                b''
-            ]),
             "",
             "My Backup 8",
             1953513556,
         ),
         (
+            "label",
             Path("/media/user/DISK_LABEL/data"),
-            b"\n".join([
-                b'{',
-                b'   "blockdevices": [',
-                b'      {',
-                b'         "uuid": "F2FC151BAC04DF13",',
-                b'         "label": "DISK_LABEL",',
-                b'         "fssize": "2000333307904",',
-                b'         "mountpoint": "/media/user/DISK_LABEL"',
-                b'      }',
-                b'   ]',
-                b'}',
-                b''
-            ]),
             "F2FC151BAC04DF13",
             "DISK_LABEL",
             1953450496,
         ),
     ],
+    indirect=["lsblk_output"],
 )
 def test_get_path_disk_info(
-        mocker,
+        lsblk_output: None,
         dir_path: Path,
-        lsblk_info: bytes,
         uuid: str,
         label: str,
         size: int
         ) -> None:
-
-    mocker.patch("subprocess.check_output", lambda _: lsblk_info)
-    mocker.patch("file_utils.get_mount_path",
-                 lambda p: Path("/".join(str(p).split("/")[:4])))
     disk_info = get_path_disk_info(dir_path)
     assert disk_info["uuid"] == uuid
     assert disk_info["label"] == label
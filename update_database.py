@@ -2,19 +2,20 @@
 """Load files to database."""
 
 import argparse
-import logging
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
 
-from file_database import DEFAULT_DATABASE
-from file_database_update import FileDatabaseUpdater
+from utils import setup_logging
 
 REHASH_INTERVAL = 180  # Number of days before re-hash file if not changed
+SECONDS_PER_DAY = 86_400
 
 
-def main(argv):
-    """Module as util use wrapper."""
+@lru_cache(maxsize=1)
+def build_arg_parser() -> argparse.ArgumentParser:
+    """CLI arguments parser, built once and reused by main() calls."""
     arg_parser = argparse.ArgumentParser(
         description="Load files to database")
     arg_parser.add_argument("--media", type=Path,
@@ -36,21 +37,28 @@ def main(argv):
         type=Path,
         help="Database file",
         required=False,
-        default=DEFAULT_DATABASE)
+        default=None)
     arg_parser.add_argument("-v", "--verbose",
                             help="Print verbose output",
                             action="count", default=0)
     arg_parser.add_argument("-c", "--clear-orfan-files",
                             help="Clear orfan file records",
                             action="store_true", default=False)
-    args = arg_parser.parse_args(argv[1:])
-    logging.basicConfig(
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        level=logging.WARNING - 10 * (args.verbose if args.verbose < 3 else 2))
+    return arg_parser
+
+
+def main(argv):
+    """Module as util use wrapper."""
+    args = build_arg_parser().parse_args(argv[1:])
+    setup_logging(args.verbose)
+
+    # DB stack is imported only when it is used, not on module import
+    from file_database import DEFAULT_DATABASE
+    from file_database_update import FileDatabaseUpdater
 
-    rehash_time = time.time() - args.rehash_interval * 24 * 3600
+    rehash_time = time.time() - args.rehash_interval * SECONDS_PER_DAY
     with FileDatabaseUpdater(
-          args.database, rehash_time) as file_db:
+          args.database or DEFAULT_DATABASE, rehash_time) as file_db:
         file_db.update_dir(args.media, max_depth=args.max_depth)
         file_db.handle_orfans(clear_orfan_files=args.clear_orfan_files)
 
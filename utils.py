@@ -1,6 +1,21 @@
+import logging
+import math
 from datetime import datetime
+from functools import lru_cache
 from typing import Callable, List, Optional
 
+_EXIF_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+
+def setup_logging(verbose: int) -> None:
+    """Configures root logger for CLI, WARNING lowered by -v count.
+        Does nothing if root logger already has handlers."""
+    if logging.getLogger().handlers:
+        return
+    logging.basicConfig(
+        format=_LOG_FORMAT, level=logging.WARNING - 10 * min(verbose, 2))
+
 
 def float2timestamp(float_timestamp: float) -> datetime:
     """Converts POSIX timestamp to datetime.datetime object."""
@@ -9,12 +24,19 @@ def float2timestamp(float_timestamp: float) -> datetime:
 
 def timeobj2exif_str(timestamp_obj: datetime) -> str:
     """Converts datetime.datetime object to exif_time."""
-    return timestamp_obj.strftime("%Y-%m-%d %H:%M:%S")
+    return timestamp_obj.strftime(_EXIF_TIME_FORMAT)
+
+
+@lru_cache(maxsize=8192)
+def _seconds2exif_str(seconds: int) -> str:
+    """Cached exif_time of whole seconds POSIX timestamp."""
+    return datetime.fromtimestamp(seconds).strftime(_EXIF_TIME_FORMAT)
 
 
 def timestamp2exif_str(float_timestamp: float) -> str:
-    """Converts POSIX timestamp to exif_time."""
-    return (timeobj2exif_str(float2timestamp(float_timestamp))
+    """Converts POSIX timestamp to exif_time.
+        exif_time has no fractions, so cache is keyed by floored seconds."""
+    return (_seconds2exif_str(math.floor(float_timestamp))
             if float_timestamp else "")
 
 
@@ -36,18 +58,22 @@ def print_table(
         formats = [str for _ in range(column_count)]
     if not aligns:
         aligns = [">" for _ in range(column_count)]
-    for row in data:
-        for i in range(column_count):
-            column_sizes[i] = max(
-                column_sizes[i], len(formats[i](row[indexes[i]])))
-    format_str = separator
-    for i in range(column_count):
-        format_str += (f"{space}{{:{aligns[i]}{column_sizes[i]}}}"
-                       f"{space}{separator}")
-    print(format_str.format(*headers))
-    for row in data:
-        print_data = [formats[i](row[indexes[i]])
-                      for i in range(column_count)]
-        print(format_str.format(*print_data))
+    cells = tuple(zip(indexes, formats))
+    formatted = [
+        [cell_format(row[index]) for index, cell_format in cells]
+        for row in data
+    ]
+    if formatted:
+        column_sizes = [
+            max(size, *map(len, column))
+            for size, column in zip(column_sizes, zip(*formatted))
+        ]
+    format_str = separator + "".join(
+        f"{space}{{:{align}{size}}}{space}{separator}"
+        for align, size in zip(aligns, column_sizes))
+    format_row = format_str.format
+    print(format_row(*headers))
+    for print_data in formatted:
+        print(format_row(*print_data))
     if footer:
-        print(format_str.format(*headers))
+        print(format_row(*headers))